@@ -6,54 +6,137 @@ Génère les access_token et refresh_token manquants pour TikTok et YouTube
 
 import os
 import sys
-import json
 import time
+import socket
+import stat
+import asyncio
+import argparse
+import functools
 import urllib.parse
 import webbrowser
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import threading
-import requests
+from contextlib import asynccontextmanager
+import aiohttp
+import orjson
 from dotenv import load_dotenv
+from tenacity import retry, wait_exponential, stop_after_attempt
 
 # Charger les variables d'environnement
 load_dotenv()
 
+# Délai maximum d'attente d'une autorisation (secondes)
+AUTH_TIMEOUT = 300
+
+# Requêtes parasites du navigateur (favicon, robots...) et leur réponse 204 brute
+PROBE_PATHS = frozenset({'/favicon.ico', '/robots.txt'})
+NO_CONTENT_RESPONSE = b'HTTP/1.1 204 No Content\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'
+
+# Marge de rafraîchissement avant expiration du token d'accès (secondes)
+REFRESH_MARGIN = 60
+
+# Statuts HTTP transitoires qui justifient un nouvel essai
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def _expires_at(token_data):
+    """Échéance absolue d'un token d'après expires_in, 0 si absente ou invalide"""
+    expires_in = int(token_data.get('expires_in') or 0)
+    return int(time.time()) + expires_in if expires_in > 0 else 0
+
+def _should_retry(retry_state):
+    """Décide si _request_json doit être rejouée
+    
+    Un GET est idempotent: erreurs réseau, timeouts et statuts transitoires sont
+    rejoués. Un POST consomme un code ou un refresh token à usage unique: il n'est
+    rejoué que si la connexion n'a jamais été établie (requête non envoyée).
+    """
+    if not retry_state.outcome.failed:
+        return False
+    
+    exception = retry_state.outcome.exception()
+    method = retry_state.args[1]
+    if method == 'GET':
+        return isinstance(exception, (aiohttp.ClientError, asyncio.TimeoutError))
+    return isinstance(exception, aiohttp.ClientConnectorError)
+
+def _resolve_waiter(future):
+    """Débloque un flux en attente de callback (exécuté dans la boucle asyncio)"""
+    if not future.done():
+        future.set_result(None)
+
 class TokenHandler(BaseHTTPRequestHandler):
     """Handler pour capturer les codes OAuth"""
     
     def do_GET(self):
         """Capture le code d'autorisation"""
-        if 'code=' in self.path:
-            # Extraire le code
-            query = urllib.parse.urlparse(self.path).query
-            params = urllib.parse.parse_qs(query)
+        # Sondes du navigateur: réponse brute, sans construire d'en-têtes
+        if self.path in PROBE_PATHS or self.path.startswith('/.well-known'):
+            self.wfile.write(NO_CONTENT_RESPONSE)
+            return
+        
+        # Extraire le code et le state
+        query = urllib.parse.urlparse(self.path).query
+        params = urllib.parse.parse_qs(query)
+        state = params.get('state', [None])[0]
+        
+        if state in self.server.expected_states and 'code' in params:
+            self.server.codes[state] = params['code'][0]
             
-            if 'code' in params:
-                self.server.auth_code = params['code'][0]
-                
-                # Réponse de succès
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                
-                success_html = """
-                <html>
-                <head><title>✅ Autorisation réussie!</title></head>
-                <body style="font-family: Arial; text-align: center; padding: 50px;">
-                    <h1>🎉 Autorisation réussie!</h1>
-                    <p>Tu peux fermer cette fenêtre et retourner au terminal.</p>
-                    <p>Le bot va maintenant générer tes tokens automatiquement!</p>
-                </body>
-                </html>
-                """
-                self.wfile.write(success_html.encode())
-                
-                # Arrêter le serveur
-                threading.Thread(target=self.server.shutdown).start()
+            # Réponse de succès
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html')
+            self.end_headers()
+            
+            success_html = """
+            <html>
+            <head><title>✅ Autorisation réussie!</title></head>
+            <body style="font-family: Arial; text-align: center; padding: 50px;">
+                <h1>🎉 Autorisation réussie!</h1>
+                <p>Tu peux fermer cette fenêtre et retourner au terminal.</p>
+                <p>Le bot va maintenant générer tes tokens automatiquement!</p>
+            </body>
+            </html>
+            """
+            self.wfile.write(success_html.encode())
+            
+            # Signaler le flux en attente
+            self._notify_waiter(state)
+        elif state in self.server.expected_states and 'error' in params:
+            # Consentement refusé (ex: error=access_denied): échec immédiat du flux
+            self.server.errors[state] = params['error'][0]
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html')
+            self.end_headers()
+            
+            error_html = """
+            <html>
+            <head><title>❌ Autorisation refusée</title></head>
+            <body style="font-family: Arial; text-align: center; padding: 50px;">
+                <h1>❌ Autorisation refusée</h1>
+                <p>Tu peux fermer cette fenêtre et retourner au terminal.</p>
+            </body>
+            </html>
+            """
+            self.wfile.write(error_html.encode())
+            
+            self._notify_waiter(state)
         else:
-            self.send_response(404)
+            # Requête sans callback OAuth attendu (prefetch, state inconnu): ignorer
+            self.send_response(204)
             self.end_headers()
     
+    def _notify_waiter(self, state):
+        """Réveille, depuis le thread du serveur, le flux asyncio qui attend ce state"""
+        waiter = self.server.waiters.get(state)
+        if waiter is not None:
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, future)
+            except RuntimeError:
+                # Boucle déjà fermée: plus personne n'attend
+                pass
+    
     def log_message(self, format, *args):
         """Supprimer les logs du serveur"""
         pass
@@ -61,28 +144,107 @@ class TokenHandler(BaseHTTPRequestHandler):
 class TokenGenerator:
     """Générateur de tokens OAuth pour TikTok et YouTube"""
     
-    def __init__(self):
+    def __init__(self, no_browser=False, tiktok_code=None, youtube_code=None, keep_fresh=False):
         self.redirect_uri = "http://localhost:8080/callback"
         
         # Credentials TikTok
         self.tiktok_client_key = os.getenv('TIKTOK_CLIENT_KEY')
         self.tiktok_client_secret = os.getenv('TIKTOK_CLIENT_SECRET')
+        self.tiktok_refresh_token = os.getenv('TIKTOK_REFRESH_TOKEN')
+        self.tiktok_expires_at = int(os.getenv('TIKTOK_ACCESS_TOKEN_EXPIRES_AT') or 0)
         
         # Credentials YouTube
         self.youtube_client_id = os.getenv('YOUTUBE_CLIENT_ID')
         self.youtube_client_secret = os.getenv('YOUTUBE_CLIENT_SECRET')
+        self.youtube_refresh_token = os.getenv('YOUTUBE_REFRESH_TOKEN')
+        
+        # Session HTTP partagée (créée dans _run)
+        self.session = None
+        
+        # Rafraîchissements en cours, partagés entre appelants concurrents
+        # (verrous créés dans la boucle asyncio qui les utilise)
+        self._refresh_locks = {}
+        self._refresh_inflight = {'tiktok': None, 'youtube': None}
+        
+        # Rafraîchir le token TikTok en arrière-plan après la génération
+        self.keep_fresh = keep_fresh
+        
+        # Mode non interactif: codes fournis en ligne de commande
+        self.no_browser = no_browser
+        self.manual_codes = {'tiktok_auth': tiktok_code, 'youtube_auth': youtube_code}
+        
+        # Serveur de callback unique pour les deux fournisseurs
+        self.server = None if no_browser else self.start_local_server()
     
     def start_local_server(self):
-        """Démarre un serveur local pour capturer le callback OAuth"""
+        """Démarre un serveur local persistant pour capturer les callbacks OAuth"""
+        # Échouer tout de suite si le port de callback est déjà occupé
+        with socket.socket() as probe:
+            if probe.connect_ex(('localhost', 8080)) == 0:
+                print("❌ Le port 8080 est déjà utilisé! Libère-le ou utilise --no-browser.")
+                sys.exit(1)
+        
         server = HTTPServer(('localhost', 8080), TokenHandler)
-        server.auth_code = None
+        server.codes = {}
+        server.errors = {}
+        server.expected_states = {'tiktok_auth', 'youtube_auth'}
+        server.waiters = {}  # state -> (boucle, future) du flux en attente
         
+        threading.Thread(target=server.serve_forever, daemon=True).start()
         print(f"🌐 Serveur local démarré sur {self.redirect_uri}")
-        server.handle_request()
         
-        return server.auth_code
+        return server
+    
+    def stop_local_server(self):
+        """Arrête le serveur de callback et libère le port 8080"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+    
+    async def wait_for_auth_code(self, auth_url, state):
+        """Ouvre l'autorisation et attend le code sans bloquer la boucle asyncio"""
+        if self.no_browser:
+            code = self.manual_codes.get(state)
+            if not code:
+                print(f"🔗 Ouvre cette URL puis relance avec le code reçu:\n{auth_url}")
+            return code
+        
+        # Future résolue par le handler: Ctrl+C annule l'attente immédiatement
+        loop = asyncio.get_running_loop()
+        received = loop.create_future()
+        self.server.waiters[state] = (loop, received)
+        
+        try:
+            # Le serveur écoute déjà: lancer le navigateur sans attendre
+            threading.Thread(target=webbrowser.open, args=(auth_url,), daemon=True).start()
+            
+            print("⏳ En attente de l'autorisation...")
+            if state not in self.server.codes and state not in self.server.errors:
+                try:
+                    await asyncio.wait_for(received, AUTH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print("⏰ Délai d'autorisation dépassé!")
+        finally:
+            self.server.waiters.pop(state, None)
+        
+        error = self.server.errors.get(state)
+        if error:
+            print(f"❌ Autorisation refusée: {error}")
+            return None
+        
+        return self.server.codes.get(state)
+    
+    @retry(wait=wait_exponential(multiplier=0.3, max=5), stop=stop_after_attempt(3),
+           retry=_should_retry, reraise=True)
+    async def _request_json(self, method, url, **kwargs):
+        """Requête HTTPS sur la session partagée, avec retry sur les erreurs transitoires"""
+        async with self.session.request(method, url, **kwargs) as response:
+            if response.status in RETRY_STATUSES:
+                response.raise_for_status()
+            return orjson.loads(await response.read())
     
-    def generate_tiktok_tokens(self):
+    async def generate_tiktok_tokens(self):
         """Génère les tokens TikTok via OAuth"""
         print("\n🎵 GÉNÉRATION DES TOKENS TIKTOK")
         print("=" * 50)
@@ -92,20 +254,17 @@ class TokenGenerator:
             return None, None, None
         
         # URL d'autorisation TikTok
-        auth_url = (
-            f"https://www.tiktok.com/v2/auth/authorize/"
-            f"?client_key={self.tiktok_client_key}"
-            f"&scope=user.info.basic,video.list,video.upload"
-            f"&response_type=code"
-            f"&redirect_uri={urllib.parse.quote(self.redirect_uri)}"
-            f"&state=tiktok_auth"
-        )
+        params = {
+            'client_key': self.tiktok_client_key,
+            'scope': 'user.info.basic,video.list,video.upload',
+            'response_type': 'code',
+            'redirect_uri': self.redirect_uri,
+            'state': 'tiktok_auth'
+        }
+        auth_url = f"https://www.tiktok.com/v2/auth/authorize/?{urllib.parse.urlencode(params)}"
         
         print(f"🔗 Ouverture de l'autorisation TikTok...")
-        webbrowser.open(auth_url)
-        
-        print("⏳ En attente de l'autorisation...")
-        auth_code = self.start_local_server()
+        auth_code = await self.wait_for_auth_code(auth_url, 'tiktok_auth')
         
         if not auth_code:
             print("❌ Aucun code d'autorisation reçu!")
@@ -125,24 +284,24 @@ class TokenGenerator:
         }
         
         try:
-            response = requests.post(token_url, data=data)
-            result = response.json()
+            result = await self._request_json('POST', token_url, data=data)
             
             if result.get('code') == 0:
                 access_token = result['data']['access_token']
                 refresh_token = result['data']['refresh_token']
+                self.tiktok_expires_at = _expires_at(result['data'])
                 
                 # Obtenir l'ID du compte business
                 profile_url = "https://business-api.tiktok.com/open_api/v1.3/user/info/"
                 headers = {'Access-Token': access_token}
                 
-                profile_response = requests.get(profile_url, headers=headers)
-                profile_data = profile_response.json()
+                profile_data = await self._request_json('GET', profile_url, headers=headers)
                 
                 business_id = None
                 if profile_data.get('code') == 0:
                     business_id = profile_data['data']['user']['user_id']
                 
+                self.tiktok_refresh_token = refresh_token
                 print("✅ Tokens TikTok générés avec succès!")
                 return access_token, refresh_token, business_id
             else:
@@ -153,7 +312,7 @@ class TokenGenerator:
             print(f"❌ Erreur lors de la génération des tokens TikTok: {e}")
             return None, None, None
     
-    def generate_youtube_tokens(self):
+    async def generate_youtube_tokens(self):
         """Génère les tokens YouTube via OAuth"""
         print("\n📺 GÉNÉRATION DES TOKENS YOUTUBE")
         print("=" * 50)
@@ -163,21 +322,19 @@ class TokenGenerator:
             return None
         
         # URL d'autorisation YouTube
-        auth_url = (
-            f"https://accounts.google.com/o/oauth2/auth"
-            f"?client_id={self.youtube_client_id}"
-            f"&redirect_uri={urllib.parse.quote(self.redirect_uri)}"
-            f"&scope=https://www.googleapis.com/auth/youtube.upload"
-            f"&response_type=code"
-            f"&access_type=offline"
-            f"&prompt=consent"
-        )
+        params = {
+            'client_id': self.youtube_client_id,
+            'redirect_uri': self.redirect_uri,
+            'scope': 'https://www.googleapis.com/auth/youtube.upload',
+            'response_type': 'code',
+            'access_type': 'offline',
+            'prompt': 'consent',
+            'state': 'youtube_auth'
+        }
+        auth_url = f"https://accounts.google.com/o/oauth2/auth?{urllib.parse.urlencode(params)}"
         
         print(f"🔗 Ouverture de l'autorisation YouTube...")
-        webbrowser.open(auth_url)
-        
-        print("⏳ En attente de l'autorisation...")
-        auth_code = self.start_local_server()
+        auth_code = await self.wait_for_auth_code(auth_url, 'youtube_auth')
         
         if not auth_code:
             print("❌ Aucun code d'autorisation reçu!")
@@ -197,11 +354,11 @@ class TokenGenerator:
         }
         
         try:
-            response = requests.post(token_url, data=data)
-            result = response.json()
+            result = await self._request_json('POST', token_url, data=data)
             
             if 'refresh_token' in result:
                 refresh_token = result['refresh_token']
+                self.youtube_refresh_token = refresh_token
                 print("✅ Token YouTube généré avec succès!")
                 return refresh_token
             else:
@@ -212,41 +369,175 @@ class TokenGenerator:
             print(f"❌ Erreur lors de la génération du token YouTube: {e}")
             return None
     
-    def update_env_file(self, tiktok_access, tiktok_refresh, tiktok_business_id, youtube_refresh):
+    async def refresh_access_token(self, provider):
+        """Rafraîchit le token d'accès d'un fournisseur ('tiktok' ou 'youtube')
+        
+        Les appels concurrents pour un même fournisseur partagent une seule
+        requête vers l'endpoint de token.
+        """
+        async with self._refresh_locks.setdefault(provider, asyncio.Lock()):
+            task = self._refresh_inflight[provider]
+            if task is None or task.done():
+                task = asyncio.create_task(self._do_refresh(provider))
+                self._refresh_inflight[provider] = task
+        
+        try:
+            # shield: l'annulation d'un appelant ne doit pas annuler la requête partagée
+            return await asyncio.shield(task)
+        finally:
+            if self._refresh_inflight[provider] is task and task.done():
+                self._refresh_inflight[provider] = None
+    
+    async def _do_refresh(self, provider):
+        """Échange le refresh_token contre un nouveau token d'accès"""
+        try:
+            if provider == 'tiktok':
+                token_url = "https://business-api.tiktok.com/open_api/v1.3/oauth2/refresh_token/"
+                payload = {
+                    'client_key': self.tiktok_client_key,
+                    'client_secret': self.tiktok_client_secret,
+                    'grant_type': 'refresh_token',
+                    'refresh_token': self.tiktok_refresh_token
+                }
+                result = await self._request_json('POST', token_url, json=payload)
+                
+                if result.get('code') == 0:
+                    self.tiktok_refresh_token = result['data']['refresh_token']
+                    self.tiktok_expires_at = _expires_at(result['data'])
+                    print("✅ Token TikTok rafraîchi!")
+                    return result['data']['access_token']
+                
+                print(f"❌ Erreur TikTok: {result.get('message', 'Erreur inconnue')}")
+                return None
+            
+            token_url = "https://oauth2.googleapis.com/token"
+            data = {
+                'client_id': self.youtube_client_id,
+                'client_secret': self.youtube_client_secret,
+                'grant_type': 'refresh_token',
+                'refresh_token': self.youtube_refresh_token
+            }
+            result = await self._request_json('POST', token_url, data=data)
+            
+            if 'access_token' in result:
+                print("✅ Token YouTube rafraîchi!")
+                return result['access_token']
+            
+            print(f"❌ Erreur YouTube: {result.get('error_description', 'Erreur inconnue')}")
+            return None
+        
+        except Exception as e:
+            print(f"❌ Erreur lors du rafraîchissement du token {provider}: {e}")
+            return None
+    
+    async def _refresh_scheduler(self):
+        """Rafraîchit le token TikTok une minute avant son expiration, en boucle"""
+        while self.tiktok_refresh_token:
+            delay = max(0, self.tiktok_expires_at - time.time() - REFRESH_MARGIN)
+            print(f"⏰ Prochain rafraîchissement TikTok dans {delay / 60:.0f} minutes")
+            await asyncio.sleep(delay)
+            
+            access_token = await self.refresh_access_token('tiktok')
+            if not access_token:
+                return
+            
+            # Écriture disque hors de la boucle d'événements
+            await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                self.update_env_file, access_token, self.tiktok_refresh_token, None, None,
+                tiktok_expires_at=self.tiktok_expires_at
+            ))
+            
+            # Sans durée de validité, la boucle rafraîchirait sans pause
+            if self.tiktok_expires_at - time.time() <= REFRESH_MARGIN:
+                print("❌ Durée de validité du token TikTok absente: rafraîchissement automatique arrêté")
+                return
+    
+    def update_env_file(self, tiktok_access, tiktok_refresh, tiktok_business_id, youtube_refresh,
+                        tiktok_expires_at=None):
         """Met à jour le fichier .env avec les nouveaux tokens"""
         print("\n💾 MISE À JOUR DU FICHIER .ENV")
         print("=" * 50)
         
+        # Seules les valeurs effectivement générées sont écrites
+        updates = {
+            'TIKTOK_ACCESS_TOKEN': tiktok_access,
+            'TIKTOK_REFRESH_TOKEN': tiktok_refresh,
+            'TIKTOK_BUSINESS_ACCOUNT_ID': tiktok_business_id,
+            'YOUTUBE_REFRESH_TOKEN': youtube_refresh,
+            'TIKTOK_ACCESS_TOKEN_EXPIRES_AT': tiktok_expires_at
+        }
+        updates = {key: value for key, value in updates.items() if value}
+        
         try:
             # Lire le fichier .env actuel
             with open('.env', 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # Remplacer les tokens
-            if tiktok_access:
-                content = content.replace('TIKTOK_ACCESS_TOKEN=your_access_token_here', 
-                                        f'TIKTOK_ACCESS_TOKEN={tiktok_access}')
-            
-            if tiktok_refresh:
-                content = content.replace('TIKTOK_REFRESH_TOKEN=your_refresh_token_here', 
-                                        f'TIKTOK_REFRESH_TOKEN={tiktok_refresh}')
+            # Indexer les lignes par clé (commentaires et lignes vides conservés tels quels)
+            entries = []
+            index = {}
+            for line in content.splitlines():
+                key = None
+                if '=' in line and not line.lstrip().startswith('#'):
+                    key = line.split('=', 1)[0].strip()
+                    index[key] = len(entries)
+                entries.append((key, line))
             
-            if tiktok_business_id:
-                content = content.replace('TIKTOK_BUSINESS_ACCOUNT_ID=your_business_account_id_here', 
-                                        f'TIKTOK_BUSINESS_ACCOUNT_ID={tiktok_business_id}')
+            # Remplacer les tokens (idempotent), ajouter les clés absentes
+            for key, value in updates.items():
+                if key in index:
+                    entries[index[key]] = (key, f"{key}={value}")
+                else:
+                    index[key] = len(entries)
+                    entries.append((key, f"{key}={value}"))
             
-            if youtube_refresh:
-                content = content.replace('YOUTUBE_REFRESH_TOKEN=your_youtube_refresh_token_here', 
-                                        f'YOUTUBE_REFRESH_TOKEN={youtube_refresh}')
+            content = '\n'.join(line for _, line in entries) + '\n'
             
-            # Sauvegarder le fichier
-            with open('.env', 'w', encoding='utf-8') as f:
+            # Sauvegarder le fichier de manière atomique
+            tmp_path = '.env.tmp'
+            # Fichier temporaire privé dès sa création (il contient les secrets)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, 'w', encoding='utf-8') as f:
                 f.write(content)
+            # Reprendre les permissions d'origine du .env (ex: 0600)
+            os.chmod(tmp_path, stat.S_IMODE(os.stat('.env').st_mode))
+            os.replace(tmp_path, '.env')
             
             print("✅ Fichier .env mis à jour avec succès!")
             
         except Exception as e:
             print(f"❌ Erreur lors de la mise à jour du .env: {e}")
+            
+            # Ne pas laisser de fichier temporaire orphelin
+            try:
+                os.unlink('.env.tmp')
+            except FileNotFoundError:
+                pass
+    
+    @asynccontextmanager
+    async def _open_session(self):
+        """Ouvre la session HTTP partagée par toutes les requêtes OAuth"""
+        connector = aiohttp.TCPConnector(limit=10, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(sock_connect=5, sock_read=15)
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            self.session = session
+            try:
+                yield session
+            finally:
+                self.session = None
+    
+    async def _run(self):
+        """Exécute les deux flux OAuth en parallèle sur une session partagée"""
+        async with self._open_session():
+            tiktok_task = asyncio.create_task(self.generate_tiktok_tokens())
+            youtube_task = asyncio.create_task(self.generate_youtube_tokens())
+            return await asyncio.gather(tiktok_task, youtube_task)
+    
+    async def _keep_fresh(self):
+        """Maintient le token TikTok valide jusqu'à l'interruption"""
+        async with self._open_session():
+            await self._refresh_scheduler()
     
     def run(self):
         """Lance la génération complète des tokens"""
@@ -255,33 +546,65 @@ class TokenGenerator:
         print("   Génération des tokens manquants pour TikTok et YouTube")
         print("🚀" + "="*60 + "🚀")
         
-        # Générer les tokens TikTok
-        tiktok_access, tiktok_refresh, tiktok_business_id = self.generate_tiktok_tokens()
-        
-        # Générer les tokens YouTube
-        youtube_refresh = self.generate_youtube_tokens()
+        # Générer les tokens TikTok et YouTube en parallèle
+        try:
+            (tiktok_access, tiktok_refresh, tiktok_business_id), youtube_refresh = asyncio.run(self._run())
+        finally:
+            # Arrêter le serveur de callback une fois les deux codes collectés
+            self.stop_local_server()
         
         # Mettre à jour le fichier .env
         if any([tiktok_access, tiktok_refresh, tiktok_business_id, youtube_refresh]):
-            self.update_env_file(tiktok_access, tiktok_refresh, tiktok_business_id, youtube_refresh)
+            tiktok_expires_at = self.tiktok_expires_at if tiktok_access else None
+            self.update_env_file(tiktok_access, tiktok_refresh, tiktok_business_id, youtube_refresh,
+                                 tiktok_expires_at=tiktok_expires_at)
             
             print("\n🎉 GÉNÉRATION TERMINÉE!")
             print("=" * 50)
             print("✅ Tes tokens ont été générés et sauvegardés dans .env")
             print("🚀 Tu peux maintenant lancer ton bot viral:")
             print("   python run_bot.py")
+            
+            if self.keep_fresh:
+                print("\n🔄 Rafraîchissement automatique du token TikTok (Ctrl+C pour arrêter)")
+                try:
+                    asyncio.run(self._keep_fresh())
+                except KeyboardInterrupt:
+                    print("\n👋 Rafraîchissement arrêté")
         else:
             print("\n❌ Aucun token n'a pu être généré.")
             print("Vérifie tes credentials dans le fichier .env")
 
+def parse_args():
+    """Arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(description="Génère les tokens OAuth TikTok et YouTube")
+    parser.add_argument('--no-browser', action='store_true',
+                        help="Ne pas ouvrir le navigateur ni démarrer le serveur local (affiche les URLs)")
+    parser.add_argument('--tiktok-code', help="Code d'autorisation TikTok (mode --no-browser)")
+    parser.add_argument('--youtube-code', help="Code d'autorisation YouTube (mode --no-browser)")
+    parser.add_argument('--keep-fresh', action='store_true',
+                        help="Rester actif et rafraîchir le token TikTok une minute avant expiration")
+    
+    args = parser.parse_args()
+    if (args.tiktok_code or args.youtube_code) and not args.no_browser:
+        parser.error("--tiktok-code et --youtube-code nécessitent --no-browser")
+    return args
+
 def main():
     """Fonction principale"""
+    args = parse_args()
+    
     if not os.path.exists('.env'):
         print("❌ Fichier .env introuvable!")
         print("Assure-toi d'avoir créé ton fichier .env avec tes credentials.")
         sys.exit(1)
     
-    generator = TokenGenerator()
+    generator = TokenGenerator(
+        no_browser=args.no_browser,
+        tiktok_code=args.tiktok_code,
+        youtube_code=args.youtube_code,
+        keep_fresh=args.keep_fresh
+    )
     generator.run()
 
 if __name__ == "__main__":
@@ -15,7 +15,7 @@ sys.path.insert(0, str(project_root))
 
 try:
     from viral_ai.config import get_config, setup_logging
-    from viral_ai.main import ViralAI
+    from viral_ai.main import ViralAI, install_event_loop
 except ImportError as e:
     print(f"❌ Import error: {e}")
     print("🔧 Make sure you've installed all dependencies:")
@@ -55,5 +55,6 @@ if __name__ == "__main__":
         print("   # Then edit .env with your TikTok API credentials")
         sys.exit(1)
     
-    # Run the bot
+    # Run the bot (uvloop if available)
+    install_event_loop()
     asyncio.run(main())
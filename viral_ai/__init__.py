@@ -3,16 +3,30 @@
 Architecture modulaire pour robustesse et maintenabilité
 """
 
+import importlib
+
 __version__ = "2.0.0"
 __author__ = "Viral AI Team"
 __description__ = "Production-ready TikTok automation with modular architecture"
 
-from .config import Config
-from .trends import TrendAnalyzer
-from .content import ContentGenerator
-from .video import VideoProducer
-from .upload import MultiPlatformUploader
-from .main import ViralAI
+# Imports paresseux: les modules lourds (vidéo, upload) ne sont chargés qu'à l'usage
+_LAZY_IMPORTS = {
+    "Config": ".config",
+    "TrendAnalyzer": ".trends",
+    "ContentGenerator": ".content",
+    "VideoProducer": ".video",
+    "MultiPlatformUploader": ".upload",
+    "ViralAI": ".main"
+}
+
+def __getattr__(name):
+    """Charge le module d'un export à son premier accès"""
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "Config",
@@ -4,16 +4,33 @@ Gestion sécurisée des configurations et secrets
 """
 
 import os
+import copy
 import yaml
+import orjson
 import logging
+import datetime
+import functools
 from typing import Dict, Any, Optional
 from pathlib import Path
 from dataclasses import dataclass
-import boto3
-from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Loader C de PyYAML (libyaml) quand il est compilé, sinon le loader Python pur
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=8)
+def _parse_yaml(path: str, mtime_ns: int) -> Any:
+    """Parse un fichier YAML, mémoïsé par (chemin, date de modification)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YAML_LOADER)
+
+def _load_yaml(path) -> Any:
+    """Charge un fichier YAML sans le reparser s'il n'a pas changé"""
+    path = os.path.abspath(path)
+    # Copie: l'appelant peut modifier le résultat sans altérer le cache
+    return copy.deepcopy(_parse_yaml(path, os.stat(path).st_mtime_ns))
+
 @dataclass
 class TikTokConfig:
     """Configuration TikTok API"""
@@ -52,6 +69,11 @@ class SecretManager:
         self.use_aws = use_aws
         if use_aws:
             try:
+                # boto3 n'est chargé que si AWS Secrets Manager est utilisé
+                import boto3
+                from botocore.exceptions import ClientError
+                
+                self._client_error = ClientError
                 self.secrets_client = boto3.client('secretsmanager')
                 logger.info("✅ AWS Secrets Manager initialized")
             except Exception as e:
@@ -66,7 +88,7 @@ class SecretManager:
             try:
                 response = self.secrets_client.get_secret_value(SecretId=secret_name)
                 return response['SecretString']
-            except ClientError as e:
+            except self._client_error as e:
                 logger.warning(f"⚠️ AWS secret {secret_name} not found: {e}")
         
         # 2. Essayer Docker Secrets
@@ -108,8 +130,7 @@ class Config:
     def _load_config(self):
         """Charge la configuration depuis YAML"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.data = yaml.safe_load(f)
+            self.data = _load_yaml(self.config_path)
         except FileNotFoundError:
             logger.error(f"❌ Config file not found: {self.config_path}")
             raise
@@ -201,13 +222,11 @@ class Config:
         templates_file = f"templates_{language}.yaml"
         
         try:
-            with open(templates_file, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            return _load_yaml(templates_file)
         except FileNotFoundError:
             logger.warning(f"⚠️ Templates file not found: {templates_file}, using English")
             try:
-                with open("templates_en.yaml", 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
+                return _load_yaml("templates_en.yaml")
             except FileNotFoundError:
                 logger.error("❌ No template files found!")
                 return {}
@@ -229,6 +248,24 @@ class Config:
         self._validate_config()
         logger.info("🔄 Configuration reloaded")
 
+class JSONFormatter(logging.Formatter):
+    """Format JSON pour production (compatible avec ELK stack)"""
+    
+    def format(self, record):
+        log_entry = {
+            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno
+        }
+        if record.exc_info:
+            log_entry['exception'] = self.formatException(record.exc_info)
+        # orjson produit de l'UTF-8 natif (emojis non échappés)
+        return orjson.dumps(log_entry).decode()
+
 # Instance globale pour faciliter l'import
 config = None
 
@@ -252,24 +289,6 @@ def setup_logging(config: Config):
     # Format selon l'environnement
     if config.is_production():
         # Format JSON pour production (compatible avec ELK stack)
-        import json
-        import datetime
-        
-        class JSONFormatter(logging.Formatter):
-            def format(self, record):
-                log_entry = {
-                    'timestamp': datetime.datetime.utcnow().isoformat(),
-                    'level': record.levelname,
-                    'logger': record.name,
-                    'message': record.getMessage(),
-                    'module': record.module,
-                    'function': record.funcName,
-                    'line': record.lineno
-                }
-                if record.exc_info:
-                    log_entry['exception'] = self.formatException(record.exc_info)
-                return json.dumps(log_entry)
-        
         formatter = JSONFormatter()
     else:
         # Format lisible pour développement
@@ -293,7 +312,9 @@ def setup_logging(config: Config):
         file_handler = RotatingFileHandler(
             'logs/viral_ai.log',
             maxBytes=10*1024*1024,  # 10MB
-            backupCount=5
+            backupCount=5,
+            encoding='utf-8',
+            delay=True  # Fichier ouvert au premier log, pas au démarrage
         )
         file_handler.setFormatter(formatter)
         root_logger.addHandler(file_handler)
@@ -13,8 +13,18 @@ from typing import Optional
 from .config import Config, setup_logging
 from .trends import TrendAnalyzer
 
+try:
+    import uvloop
+except ImportError:  # Windows ou uvloop non installé
+    uvloop = None
+
 logger = logging.getLogger(__name__)
 
+def install_event_loop():
+    """Utilise uvloop (libuv) comme boucle asyncio quand il est disponible"""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 class ViralAI:
     """Orchestrateur principal du système Viral AI"""
     
@@ -23,6 +33,10 @@ class ViralAI:
         self.running = False
         self.trend_analyzer: Optional[TrendAnalyzer] = None
         
+        # Réveil immédiat de l'attente entre cycles à l'arrêt (créés dans la boucle)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -33,6 +47,8 @@ class ViralAI:
         """Handle shutdown signals gracefully"""
         logger.info(f"📡 Received signal {signum}, shutting down gracefully...")
         self.running = False
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
     
     async def initialize(self):
         """Initialize all components"""
@@ -66,7 +82,7 @@ class ViralAI:
             
             # For now, just log the top trends
             for i, trend in enumerate(trends[:5], 1):
-                logger.info(f"#{i} {trend.hashtag} (viral score: {trend.viral_potential:.3f})")
+                logger.info("#%d %s (viral score: %.3f)", i, trend.hashtag, trend.viral_potential)
             
             # TODO: Implement content generation
             logger.info("🧠 Content generation - Coming soon!")
@@ -87,11 +103,14 @@ class ViralAI:
         """Main run loop"""
         logger.info("🚀 Starting Viral AI System...")
         
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self.running = True
+        
         try:
             # Initialize components
             await self.initialize()
             
-            self.running = True
             cycle_count = 0
             
             logger.info("🎯 Viral AI System is now running!")
@@ -118,11 +137,11 @@ class ViralAI:
                 cycle_interval = self.config.get('system.cycle_interval_minutes', 30) * 60
                 logger.info(f"😴 Waiting {cycle_interval//60} minutes before next cycle...")
                 
-                # Sleep with interruption check
-                for _ in range(cycle_interval):
-                    if not self.running:
-                        break
-                    await asyncio.sleep(1)
+                # Attendre l'intervalle, ou le signal d'arrêt
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=cycle_interval)
+                except asyncio.TimeoutError:
+                    pass
             
         except KeyboardInterrupt:
             logger.info("👋 Shutdown requested by user")
@@ -161,4 +180,5 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    install_event_loop()
     asyncio.run(main())
@@ -5,15 +5,18 @@ Analyse de tendances avec vraie API TikTok et token bucket rate limiting
 
 import asyncio
 import logging
+import re
+import sys
 import time
-import json
 from typing import Dict, List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
+import numpy as np
 import aiohttp
 import redis.asyncio as redis
-from tenacity import retry, wait_exponential, stop_after_attempt
+from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception
 import sqlalchemy as sa
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
 
@@ -21,11 +24,39 @@ from .config import Config
 
 logger = logging.getLogger(__name__)
 
+# Mots-clés de hashtags, compilés une fois (recherche de sous-chaîne, insensible à la casse)
+TECH_BONUS_PATTERN = re.compile(r'ai|tech|gpu|crypto|gaming|ml|data', re.IGNORECASE)
+TECH_CATEGORY_PATTERN = re.compile(r'ai|tech|gpu|crypto|gaming|ml|data|code', re.IGNORECASE)
+VIRAL_CATEGORY_PATTERN = re.compile(r'fyp|viral|trending|amazing|incredible', re.IGNORECASE)
+
+# Statuts HTTP transitoires qui justifient un nouvel essai
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# PRAGMAs SQLite appliqués à chaque nouvelle connexion du pool:
+# lecteurs non bloqués pendant les écritures, un seul fsync par commit
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Taille des lots de la clause IN (sous la limite de 999 variables des SQLite < 3.32)
+IN_CLAUSE_BATCH_SIZE = 500
+
+# __slots__ générés pour les dataclasses (Python 3.10+)
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 Base = declarative_base()
 
 class TrendRecord(Base):
     """Modèle de données pour les tendances"""
     __tablename__ = 'trends'
+    __table_args__ = (
+        # Fenêtres temporelles: cache de fallback et nettoyage
+        sa.Index('ix_trends_fetched_at', 'fetched_at'),
+        # Classements par potentiel viral (top N sans tri de toute la table)
+        sa.Index('ix_trends_viral_potential', 'viral_potential'),
+    )
     
     id = sa.Column(sa.Integer, primary_key=True)
     hashtag = sa.Column(sa.String(100), unique=True, nullable=False)
@@ -39,7 +70,7 @@ class TrendRecord(Base):
     api_source = sa.Column(sa.String(50), default='creative_center')
     compliance_verified = sa.Column(sa.Boolean, default=True)
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TrendData:
     """Structure de données pour une tendance"""
     hashtag: str
@@ -52,6 +83,9 @@ class TrendData:
     api_source: str = 'creative_center'
     compliance_verified: bool = True
 
+# Colonnes de TrendRecord dans l'ordre des champs de TrendData (construction positionnelle)
+TREND_DATA_COLUMNS = tuple(getattr(TrendRecord, field.name) for field in fields(TrendData))
+
 class TokenBucket:
     """Token bucket pour rate limiting TikTok API (600 req/min)"""
     
@@ -102,10 +136,23 @@ class TokenBucket:
         """Attend que les tokens soient disponibles, retourne le temps d'attente"""
         while not await self.consume(tokens):
             wait_time = tokens / self.refill_rate
-            logger.info(f"⏳ Rate limit reached, waiting {wait_time:.1f}s for {tokens} tokens")
+            logger.info("⏳ Rate limit reached, waiting %.1fs for %d tokens", wait_time, tokens)
             await asyncio.sleep(wait_time)
         return 0
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure une connexion SQLite à son ouverture"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def _is_transient_error(exception: BaseException) -> bool:
+    """Erreur réseau ou statut transitoire (les 4xx définitifs ne sont pas rejoués)"""
+    if isinstance(exception, aiohttp.ClientResponseError):
+        return exception.status in RETRY_STATUSES
+    return isinstance(exception, (aiohttp.ClientError, asyncio.TimeoutError))
+
 class TikTokAPIClient:
     """Client API TikTok avec gestion complète des tokens et rate limiting"""
     
@@ -123,8 +170,24 @@ class TikTokAPIClient:
             "Content-Type": "application/json"
         }
         
+        # Session HTTP persistante (créée à la première requête)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
         logger.info("✅ TikTok API Client initialized")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Session partagée: pool de connexions et cache DNS réutilisés entre les cycles"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+            )
+        return self._session
+    
+    async def close(self):
+        """Ferme la session HTTP"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+    
     async def refresh_access_token(self) -> bool:
         """Rafraîchit le token d'accès (expire en 24h)"""
         refresh_url = f"{self.base_url}/oauth2/refresh_token/"
@@ -137,34 +200,35 @@ class TikTokAPIClient:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(refresh_url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            session = self._get_session()
+            async with session.post(refresh_url, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    if data.get("code") == 0:
+                        # Mettre à jour les tokens
+                        new_access_token = data["data"]["access_token"]
+                        new_refresh_token = data["data"]["refresh_token"]
+                        
+                        self.config.tiktok.access_token = new_access_token
+                        self.config.tiktok.refresh_token = new_refresh_token
+                        self.headers["Access-Token"] = new_access_token
                         
-                        if data.get("code") == 0:
-                            # Mettre à jour les tokens
-                            new_access_token = data["data"]["access_token"]
-                            new_refresh_token = data["data"]["refresh_token"]
-                            
-                            self.config.tiktok.access_token = new_access_token
-                            self.config.tiktok.refresh_token = new_refresh_token
-                            self.headers["Access-Token"] = new_access_token
-                            
-                            logger.info("✅ Access token refreshed successfully")
-                            return True
-                        else:
-                            logger.error(f"❌ Token refresh failed: {data.get('message')}")
-                            return False
+                        logger.info("✅ Access token refreshed successfully")
+                        return True
                     else:
-                        logger.error(f"❌ Token refresh HTTP error: {response.status}")
+                        logger.error(f"❌ Token refresh failed: {data.get('message')}")
                         return False
+                else:
+                    logger.error(f"❌ Token refresh HTTP error: {response.status}")
+                    return False
         
         except Exception as e:
             logger.error(f"❌ Token refresh exception: {e}")
             return False
     
-    @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
+    @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3),
+           retry=retry_if_exception(_is_transient_error), reraise=True)
     async def fetch_trending_hashtags(self, limit: int = 50, region: str = "US") -> List[TrendData]:
         """Récupère les hashtags tendance via Creative Center API"""
         
@@ -180,44 +244,45 @@ class TikTokAPIClient:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, params=params) as response:
-                    
-                    if response.status == 401:
-                        # Token expiré, essayer de le rafraîchir
-                        if await self.refresh_access_token():
-                            # Retry avec le nouveau token
-                            async with session.get(url, headers=self.headers, params=params) as retry_response:
-                                if retry_response.status == 200:
-                                    data = await retry_response.json()
-                                else:
-                                    raise aiohttp.ClientResponseError(
-                                        request_info=retry_response.request_info,
-                                        history=retry_response.history,
-                                        status=retry_response.status
-                                    )
-                        else:
-                            raise Exception("Failed to refresh access token")
-                    
-                    elif response.status == 200:
-                        data = await response.json()
+            session = self._get_session()
+            async with session.get(url, headers=self.headers, params=params) as response:
+                
+                if response.status == 401:
+                    # Token expiré, essayer de le rafraîchir
+                    if await self.refresh_access_token():
+                        # Retry avec le nouveau token
+                        async with session.get(url, headers=self.headers, params=params) as retry_response:
+                            if retry_response.status == 200:
+                                data = await retry_response.json()
+                            else:
+                                raise aiohttp.ClientResponseError(
+                                    request_info=retry_response.request_info,
+                                    history=retry_response.history,
+                                    status=retry_response.status
+                                )
                     else:
-                        raise aiohttp.ClientResponseError(
-                            request_info=response.request_info,
-                            history=response.history,
-                            status=response.status
-                        )
+                        raise Exception("Failed to refresh access token")
+                
+                elif response.status == 200:
+                    data = await response.json()
+                else:
+                    raise aiohttp.ClientResponseError(
+                        request_info=response.request_info,
+                        history=response.history,
+                        status=response.status
+                    )
             
             # Parser la réponse
             trends = []
             if data.get("code") == 0 and "data" in data:
                 hashtag_list = data["data"].get("hashtag_list", [])
+                viral_potentials = self._calculate_viral_potentials(hashtag_list)
                 
-                for item in hashtag_list:
+                for item, viral_potential in zip(hashtag_list, viral_potentials):
                     trend = TrendData(
                         hashtag=f"#{item.get('hashtag_name', '')}",
                         trend_score=item.get("trend_score", 0.5),
-                        viral_potential=self._calculate_viral_potential(item),
+                        viral_potential=float(viral_potential),
                         volume=item.get("publish_cnt", 0),
                         growth_rate=item.get("trend_score", 0) / 100,  # Normaliser
                         category=self._categorize_hashtag(item.get('hashtag_name', '')),
@@ -233,47 +298,45 @@ class TikTokAPIClient:
             logger.error(f"❌ Failed to fetch trending hashtags: {e}")
             raise
     
-    def _calculate_viral_potential(self, hashtag_data: Dict) -> float:
-        """Calcule le potentiel viral basé sur les métriques TikTok"""
-        score = 0.0
+    def _calculate_viral_potentials(self, hashtag_list: List[Dict]) -> np.ndarray:
+        """Calcule le potentiel viral de tous les hashtags en une passe vectorisée"""
+        count = len(hashtag_list)
         
         # Score de tendance (0-100 de TikTok)
-        trend_score = hashtag_data.get("trend_score", 0) / 100
-        score += trend_score * 0.4
+        trend_scores = np.fromiter(
+            (item.get("trend_score", 0) for item in hashtag_list), dtype=np.float64, count=count
+        ) / 100
+        publish_counts = np.fromiter(
+            (item.get("publish_cnt", 0) for item in hashtag_list), dtype=np.int64, count=count
+        )
         
-        # Volume de publications
-        publish_count = hashtag_data.get("publish_cnt", 0)
-        if 1000 <= publish_count <= 50000:  # Sweet spot
-            score += 0.3
-        elif publish_count > 50000:
-            score += 0.1  # Oversaturated
-        elif publish_count > 100:
-            score += 0.2
+        # Bonus pour catégories tech
+        is_tech = np.fromiter(
+            (TECH_BONUS_PATTERN.search(item.get('hashtag_name', '')) is not None for item in hashtag_list),
+            dtype=bool, count=count
+        )
+        
+        scores = trend_scores * 0.4
+        
+        # Volume de publications: sweet spot 1000-50000, saturé au-delà
+        scores += np.select(
+            [(publish_counts >= 1000) & (publish_counts <= 50000), publish_counts > 50000, publish_counts > 100],
+            [0.3, 0.1, 0.2],
+            default=0.0
+        )
         
         # Croissance (basée sur trend_score)
-        if trend_score > 0.8:
-            score += 0.2
-        elif trend_score > 0.6:
-            score += 0.1
+        scores += np.select([trend_scores > 0.8, trend_scores > 0.6], [0.2, 0.1], default=0.0)
         
-        # Bonus pour catégories tech
-        hashtag_name = hashtag_data.get('hashtag_name', '').lower()
-        tech_keywords = ['ai', 'tech', 'gpu', 'crypto', 'gaming', 'ml', 'data']
-        if any(keyword in hashtag_name for keyword in tech_keywords):
-            score += 0.1
+        scores += np.where(is_tech, 0.1, 0.0)
         
-        return min(score, 1.0)
+        return np.minimum(scores, 1.0)
     
     def _categorize_hashtag(self, hashtag: str) -> str:
         """Catégorise un hashtag"""
-        hashtag_lower = hashtag.lower()
-        
-        tech_keywords = ['ai', 'tech', 'gpu', 'crypto', 'gaming', 'ml', 'data', 'code']
-        viral_keywords = ['fyp', 'viral', 'trending', 'amazing', 'incredible']
-        
-        if any(keyword in hashtag_lower for keyword in tech_keywords):
+        if TECH_CATEGORY_PATTERN.search(hashtag):
             return 'tech'
-        elif any(keyword in hashtag_lower for keyword in viral_keywords):
+        elif VIRAL_CATEGORY_PATTERN.search(hashtag):
             return 'viral'
         else:
             return 'general'
@@ -284,8 +347,26 @@ class TrendAnalyzer:
     def __init__(self, config: Config):
         self.config = config
         
-        # Connexion base de données
-        self.engine = create_async_engine(config.database.url)
+        # Connexion base de données (pool de connexions persistantes)
+        database_url = make_url(config.database.url)
+        if database_url.drivername == 'sqlite':
+            # Le moteur async exige un driver async
+            database_url = database_url.set(drivername='sqlite+aiosqlite')
+        
+        in_memory = database_url.database in (None, '', ':memory:')
+        pool_options = {}
+        if not in_memory:
+            pool_options = {
+                'pool_size': config.database.pool_size,
+                'max_overflow': config.database.max_overflow
+            }
+            if database_url.get_backend_name() == 'sqlite':
+                # Les SQLAlchemy 2.0.x antérieurs utilisent NullPool par défaut pour aiosqlite
+                pool_options['poolclass'] = sa.pool.AsyncAdaptedQueuePool
+        
+        self.engine = create_async_engine(database_url, **pool_options)
+        if database_url.get_backend_name() == 'sqlite' and not in_memory:
+            sa.event.listen(self.engine.sync_engine, 'connect', _set_sqlite_pragmas)
         self.async_session = sessionmaker(
             self.engine, class_=AsyncSession, expire_on_commit=False
         )
@@ -308,6 +389,10 @@ class TrendAnalyzer:
         """Initialise la base de données"""
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            
+            # create_all ne touche pas aux tables existantes: ajouter les index manquants
+            for index in TrendRecord.__table__.indexes:
+                await conn.run_sync(index.create, checkfirst=True)
         logger.info("✅ Database initialized")
     
     async def fetch_viral_trends(self, limit: int = 50, region: str = "US") -> List[TrendData]:
@@ -340,12 +425,20 @@ class TrendAnalyzer:
         """Sauvegarde les tendances en base"""
         async with self.async_session() as session:
             try:
-                for trend_data in trends:
-                    # Vérifier si existe déjà
+                # Charger les tendances déjà connues, une requête par lot de hashtags
+                hashtags = list(dict.fromkeys(trend_data.hashtag for trend_data in trends))
+                existing_trends = {}
+                for start in range(0, len(hashtags), IN_CLAUSE_BATCH_SIZE):
                     existing = await session.execute(
-                        sa.select(TrendRecord).where(TrendRecord.hashtag == trend_data.hashtag)
+                        sa.select(TrendRecord).where(
+                            TrendRecord.hashtag.in_(hashtags[start:start + IN_CLAUSE_BATCH_SIZE])
+                        )
                     )
-                    existing_trend = existing.scalar_one_or_none()
+                    existing_trends.update((record.hashtag, record) for record in existing.scalars())
+                fetched_at = datetime.utcnow()
+                
+                for trend_data in trends:
+                    existing_trend = existing_trends.get(trend_data.hashtag)
                     
                     if existing_trend:
                         # Mettre à jour
@@ -353,7 +446,7 @@ class TrendAnalyzer:
                         existing_trend.viral_potential = trend_data.viral_potential
                         existing_trend.volume = trend_data.volume
                         existing_trend.growth_rate = trend_data.growth_rate
-                        existing_trend.fetched_at = datetime.utcnow()
+                        existing_trend.fetched_at = fetched_at
                     else:
                         # Créer nouveau
                         new_trend = TrendRecord(
@@ -368,6 +461,7 @@ class TrendAnalyzer:
                             compliance_verified=trend_data.compliance_verified
                         )
                         session.add(new_trend)
+                        existing_trends[trend_data.hashtag] = new_trend
                 
                 await session.commit()
                 logger.info(f"✅ Stored {len(trends)} trends in database")
@@ -384,31 +478,15 @@ class TrendAnalyzer:
                 # Récupérer les tendances récentes (moins de 4 heures)
                 cutoff_time = datetime.utcnow() - timedelta(hours=4)
                 
+                # Colonnes brutes: pas d'objets ORM ni d'identity map à construire
                 result = await session.execute(
-                    sa.select(TrendRecord)
+                    sa.select(*TREND_DATA_COLUMNS)
                     .where(TrendRecord.fetched_at > cutoff_time)
                     .order_by(TrendRecord.viral_potential.desc())
                     .limit(limit)
                 )
                 
-                records = result.scalars().all()
-                
-                trends = []
-                for record in records:
-                    trend = TrendData(
-                        hashtag=record.hashtag,
-                        trend_score=record.trend_score,
-                        viral_potential=record.viral_potential,
-                        volume=record.volume,
-                        growth_rate=record.growth_rate,
-                        category=record.category,
-                        region=record.region,
-                        api_source=record.api_source,
-                        compliance_verified=record.compliance_verified
-                    )
-                    trends.append(trend)
-                
-                return trends
+                return [TrendData(*row) for row in result]
             
             except Exception as e:
                 logger.error(f"❌ Failed to get cached trends: {e}")
@@ -418,11 +496,7 @@ class TrendAnalyzer:
         """Récupère les analytics des tendances"""
         async with self.async_session() as session:
             try:
-                # Statistiques générales
-                total_trends = await session.execute(sa.select(sa.func.count(TrendRecord.id)))
-                total_count = total_trends.scalar()
-                
-                # Tendances par catégorie
+                # Tendances par catégorie (le total s'en déduit, category est NOT NULL)
                 category_stats = await session.execute(
                     sa.select(TrendRecord.category, sa.func.count(TrendRecord.id))
                     .group_by(TrendRecord.category)
@@ -432,6 +506,8 @@ class TrendAnalyzer:
                 for category, count in category_stats:
                     categories[category] = count
                 
+                total_count = sum(categories.values())
+                
                 # Top tendances virales
                 top_viral = await session.execute(
                     sa.select(TrendRecord.hashtag, TrendRecord.viral_potential)
@@ -478,6 +554,7 @@ class TrendAnalyzer:
     
     async def close(self):
         """Ferme les connexions"""
+        await self.api_client.close()
         await self.redis.close()
         await self.engine.dispose()
         logger.info("✅ TrendAnalyzer connections closed")